@@ -7,6 +7,7 @@
 from dagster._annotations import public
 from dagster._record import record
 
+from dagster_airlift.constants import AUTOMAPPED_TASK_METADATA_KEY
 from dagster_airlift.core.airflow_instance import AirflowInstance
 from dagster_airlift.core.serialization.compute import (
     AirliftMetadataMappingInfo,
@@ -56,6 +57,15 @@ def mapping_info(self) -> AirliftMetadataMappingInfo:
     def all_asset_specs_by_key(self) -> Mapping[AssetKey, AssetSpec]:
         return {spec.key: spec for spec in self.all_asset_specs}
 
+    @cached_property
+    def automapped_asset_keys(self) -> AbstractSet[AssetKey]:
+        """The keys of assets which were automatically created for airflow tasks."""
+        return {
+            spec.key
+            for spec in self.all_asset_specs
+            if spec.metadata.get(AUTOMAPPED_TASK_METADATA_KEY)
+        }
+
     @public
     def task_ids_in_dag(self, dag_id: str) -> set[str]:
         """Returns the task ids within the given dag_id.
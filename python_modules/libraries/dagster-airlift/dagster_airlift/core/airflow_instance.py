@@ -237,8 +237,12 @@ def get_dag_runs_batch(
         end_date_gte: datetime.datetime,
         end_date_lte: datetime.datetime,
         offset: int = 0,
+        limit: Optional[int] = None,
     ) -> list["DagRun"]:
-        """Return a batch of dag runs for a list of dag_ids. Ordered by end_date."""
+        """Return a batch of dag runs for a list of dag_ids. Ordered by end_date.
+
+        At most `limit` dag runs are returned, defaulting to `batch_dag_runs_limit`.
+        """
         response = self.auth_backend.get_session().post(
             f"{self.get_api_url()}/dags/~/dagRuns/list",
             json={
@@ -248,7 +252,7 @@ def get_dag_runs_batch(
                 "order_by": "end_date",
                 "states": ["success"],
                 "page_offset": offset,
-                "page_limit": self.batch_dag_runs_limit,
+                "page_limit": limit if limit is not None else self.batch_dag_runs_limit,
             },
         )
         if response.status_code == 200:
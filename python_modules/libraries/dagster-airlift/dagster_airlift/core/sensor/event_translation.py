@@ -1,5 +1,5 @@
 from collections import defaultdict
-from collections.abc import Iterable, Mapping, Sequence
+from collections.abc import Iterable, Iterator, Mapping, Sequence
 from typing import AbstractSet, Any, Callable, Union, cast  # noqa: UP035
 
 from dagster import (
@@ -101,20 +101,16 @@ def get_timestamp_from_materialization(event: AssetEvent) -> float:
 
 def synthetic_mats_for_peered_dag_asset_keys(
     dag_run: DagRun, airflow_data: AirflowDefinitionsData
-) -> Sequence[AssetMaterialization]:
-    return [
-        dag_synthetic_mat(dag_run, airflow_data, asset_key)
-        for asset_key in airflow_data.peered_dag_asset_keys_by_dag_handle[DagHandle(dag_run.dag_id)]
-    ]
+) -> Iterator[AssetMaterialization]:
+    for asset_key in airflow_data.peered_dag_asset_keys_by_dag_handle[DagHandle(dag_run.dag_id)]:
+        yield dag_synthetic_mat(dag_run, airflow_data, asset_key)
 
 
 def synthetic_mats_for_mapped_dag_asset_keys(
     dag_run: DagRun, airflow_data: AirflowDefinitionsData
-) -> Sequence[AssetMaterialization]:
-    return [
-        dag_synthetic_mat(dag_run, airflow_data, asset_key)
-        for asset_key in airflow_data.mapped_asset_keys_by_dag_handle[DagHandle(dag_run.dag_id)]
-    ]
+) -> Iterator[AssetMaterialization]:
+    for asset_key in airflow_data.mapped_asset_keys_by_dag_handle[DagHandle(dag_run.dag_id)]:
+        yield dag_synthetic_mat(dag_run, airflow_data, asset_key)
 
 
 def dag_synthetic_mat(
@@ -166,21 +162,17 @@ def synthetic_mats_for_task_instance(
     airflow_data: AirflowDefinitionsData,
     dag_run: DagRun,
     task_instance: TaskInstance,
-) -> Sequence[AssetMaterialization]:
+) -> Iterator[AssetMaterialization]:
     asset_keys = airflow_data.asset_keys_in_task(dag_run.dag_id, task_instance.task_id)
     return synthetic_mats_for_mapped_asset_keys(dag_run, task_instance, asset_keys)
 
 
 def synthetic_mats_for_mapped_asset_keys(
     dag_run: DagRun, task_instance: TaskInstance, asset_keys: AbstractSet[AssetKey]
-) -> Sequence[AssetMaterialization]:
-    mats = []
+) -> Iterator[AssetMaterialization]:
     for asset_key in asset_keys:
-        mats.append(
-            AssetMaterialization(
-                asset_key=asset_key,
-                description=task_instance.note,
-                metadata=get_task_instance_metadata(dag_run, task_instance),
-            )
+        yield AssetMaterialization(
+            asset_key=asset_key,
+            description=task_instance.note,
+            metadata=get_task_instance_metadata(dag_run, task_instance),
         )
-    return mats
@@ -1,6 +1,10 @@
-from collections.abc import Iterable, Iterator, Sequence
-from datetime import timedelta
-from typing import Optional
+import time
+from collections import defaultdict
+from collections.abc import Iterator, Mapping, Sequence
+from datetime import datetime, timedelta
+from functools import lru_cache
+from operator import itemgetter
+from typing import AbstractSet, Optional  # noqa: UP035
 
 from dagster import (
     AssetCheckKey,
@@ -16,6 +20,7 @@
 )
 from dagster._core.definitions.asset_check_evaluation import AssetCheckEvaluation
 from dagster._core.definitions.asset_selection import AssetSelection
+from dagster._core.definitions.base_asset_graph import BaseAssetGraph
 from dagster._core.definitions.events import AssetObservation
 from dagster._core.definitions.repository_definition.repository_definition import (
     RepositoryDefinition,
@@ -26,6 +31,7 @@
     user_code_error_boundary,
 )
 from dagster._core.storage.dagster_run import DagsterRun, RunsFilter
+from dagster._core.utils import InheritContextThreadPoolExecutor
 from dagster._grpc.client import DEFAULT_SENSOR_GRPC_TIMEOUT
 from dagster._record import record
 from dagster._serdes import deserialize_value, serialize_value
@@ -33,7 +39,6 @@
 from dagster._time import datetime_from_timestamp, get_current_datetime
 
 from dagster_airlift.constants import (
-    AUTOMAPPED_TASK_METADATA_KEY,
     DAG_RUN_ID_TAG_KEY,
     EFFECTIVE_TIMESTAMP_METADATA_KEY,
     TASK_ID_TAG_KEY,
@@ -54,29 +59,43 @@
 MAIN_LOOP_TIMEOUT_SECONDS = DEFAULT_SENSOR_GRPC_TIMEOUT - 20
 DEFAULT_AIRFLOW_SENSOR_INTERVAL_SECONDS = 1
 START_LOOKBACK_SECONDS = 60  # Lookback one minute in time for the initial setting of the cursor.
+# The number of dag runs requested in the first page of a query. Each subsequent page doubles in size, up to the
+# `batch_dag_runs_limit` of the airflow instance.
+INITIAL_DAG_RUNS_BATCH_SIZE = 10
+# The number of dag runs within a page whose task instances and dagster runs are fetched concurrently.
+DAG_RUN_PROCESSING_MAX_WORKERS = 8
+# When consecutive polls find no dag runs, the interval before airflow is polled again doubles, up to this many seconds.
+MAX_IDLE_POLL_BACKOFF_SECONDS = 60
 
 
 @whitelist_for_serdes
 @record
 class AirflowPollingSensorCursor:
-    """A cursor that stores the last effective timestamp and the last polled dag id."""
+    """A cursor that stores the end date range being polled, and the end date and run id of the
+    last processed dag run within that range. When recent polls have found no dag runs, it also
+    stores the number of such polls and the time before which airflow should not be polled again.
+    """
 
     end_date_gte: Optional[float] = None
     end_date_lte: Optional[float] = None
-    dag_query_offset: Optional[int] = None
+    last_end_date: Optional[float] = None
+    last_run_id: Optional[str] = None
+    dag_runs_batch_size: Optional[int] = None
+    idle_poll_count: Optional[int] = None
+    next_poll_not_before: Optional[float] = None
 
 
-class AirliftSensorEventTransformerError(DagsterUserCodeExecutionError):
-    """Error raised when an error occurs in the event transformer function."""
+def _max_idle_poll_count(minimum_interval_seconds: int) -> int:
+    """The number of consecutive idle polls after which the backoff stops growing."""
+    idle_poll_count, backoff_seconds = 1, minimum_interval_seconds
+    while 0 < backoff_seconds < MAX_IDLE_POLL_BACKOFF_SECONDS:
+        idle_poll_count += 1
+        backoff_seconds *= 2
+    return idle_poll_count
 
 
-def check_keys_for_asset_keys(
-    repository_def: RepositoryDefinition, asset_keys: set[AssetKey]
-) -> Iterable[AssetCheckKey]:
-    for assets_def in repository_def.asset_graph.assets_defs:
-        for check_spec in assets_def.check_specs:
-            if check_spec.asset_key in asset_keys:
-                yield check_spec.key
+class AirliftSensorEventTransformerError(DagsterUserCodeExecutionError):
+    """Error raised when an error occurs in the event transformer function."""
 
 
 def build_airflow_polling_sensor(
@@ -108,6 +127,7 @@ def build_airflow_polling_sensor(
     airflow_data = AirflowDefinitionsData(
         airflow_instance=airflow_instance, airflow_mapped_assets=mapped_assets
     )
+    max_idle_poll_count = _max_idle_poll_count(minimum_interval_seconds)
 
     @sensor(
         name=f"{airflow_data.airflow_instance.name}__airflow_dag_status_sensor",
@@ -131,46 +151,85 @@ def airflow_dag_sensor(context: SensorEvaluationContext) -> SensorResult:
             context.log.info(f"Failed to interpret cursor. Starting from scratch. Error: {e}")
             cursor = AirflowPollingSensorCursor()
         current_date = get_current_datetime()
-        current_dag_offset = cursor.dag_query_offset or 0
+        if cursor.next_poll_not_before and current_date.timestamp() < cursor.next_poll_not_before:
+            context.log.info(
+                f"No recent dag runs found for {airflow_data.airflow_instance.name}. Skipping poll until "
+                f"{datetime_from_timestamp(cursor.next_poll_not_before).isoformat()}."
+            )
+            return SensorResult()
         end_date_gte = (
             cursor.end_date_gte
             or (current_date - timedelta(seconds=START_LOOKBACK_SECONDS)).timestamp()
         )
         end_date_lte = cursor.end_date_lte or current_date.timestamp()
+        dag_runs_batch_size = cursor.dag_runs_batch_size or INITIAL_DAG_RUNS_BATCH_SIZE
+        dag_ids = list(airflow_data.dag_ids_with_mapped_asset_keys)
         sensor_iter = materializations_and_requests_from_batch_iter(
             context=context,
-            end_date_gte=end_date_gte,
-            end_date_lte=end_date_lte,
-            offset=current_dag_offset,
+            end_date_gte=datetime_from_timestamp(end_date_gte),
+            end_date_lte=datetime_from_timestamp(end_date_lte),
+            last_end_date=cursor.last_end_date,
+            last_run_id=cursor.last_run_id,
+            batch_size=dag_runs_batch_size,
+            dag_ids=dag_ids,
             airflow_data=airflow_data,
         )
         all_asset_events: list[AssetMaterialization] = []
         all_check_keys: set[AssetCheckKey] = set()
-        latest_offset = current_dag_offset
+        last_end_date = cursor.last_end_date
+        last_run_id = cursor.last_run_id
         repository_def = check.not_none(context.repository_def)
-        while get_current_datetime() - current_date < timedelta(seconds=MAIN_LOOP_TIMEOUT_SECONDS):
-            batch_result = next(sensor_iter, None)
-            if batch_result is None:
-                break
-            all_asset_events.extend(batch_result.asset_events)
-
-            all_check_keys.update(
-                check_keys_for_asset_keys(repository_def, batch_result.all_asset_keys_materialized)
-            )
-            latest_offset = batch_result.idx
+        asset_graph = repository_def.asset_graph
+        deadline = time.monotonic() + MAIN_LOOP_TIMEOUT_SECONDS
+        try:
+            while time.monotonic() < deadline:
+                batch_result = next(sensor_iter, None)
+                if batch_result is None:
+                    break
+                all_asset_events.extend(batch_result.asset_events)
+
+                # Each asset node already holds the keys of the checks which target it, so there is
+                # no need to scan every assets definition for matching check specs.
+                for asset_key in batch_result.all_asset_keys_materialized:
+                    if asset_graph.has(asset_key):
+                        all_check_keys.update(asset_graph.get(asset_key).check_keys)
+                last_end_date = batch_result.end_date
+                last_run_id = batch_result.run_id
+                dag_runs_batch_size = batch_result.dag_runs_batch_size
+        finally:
+            # Cancel any dag runs still queued for processing as soon as the loop exits, rather than
+            # once the iterator is garbage collected.
+            sensor_iter.close()
 
         if batch_result is not None:
             new_cursor = AirflowPollingSensorCursor(
                 end_date_gte=end_date_gte,
                 end_date_lte=end_date_lte,
-                dag_query_offset=latest_offset + 1,
+                last_end_date=last_end_date,
+                last_run_id=last_run_id,
+                dag_runs_batch_size=dag_runs_batch_size,
+            )
+        elif last_run_id is None:
+            # We have completed iteration for this range, and it contained no dag runs. Back off
+            # polling airflow until activity resumes.
+            idle_poll_count = min((cursor.idle_poll_count or 0) + 1, max_idle_poll_count)
+            backoff_seconds = min(
+                minimum_interval_seconds * 2 ** (idle_poll_count - 1),
+                MAX_IDLE_POLL_BACKOFF_SECONDS,
+            )
+            new_cursor = AirflowPollingSensorCursor(
+                end_date_gte=end_date_lte,
+                end_date_lte=None,
+                dag_runs_batch_size=dag_runs_batch_size,
+                idle_poll_count=idle_poll_count,
+                next_poll_not_before=current_date.timestamp() + backoff_seconds,
             )
         else:
             # We have completed iteration for this range
             new_cursor = AirflowPollingSensorCursor(
                 end_date_gte=end_date_lte,
                 end_date_lte=None,
-                dag_query_offset=0,
+                dag_runs_batch_size=dag_runs_batch_size,
             )
         updated_asset_events = _get_transformer_result(
             event_transformer_fn=event_transformer_fn,
@@ -199,18 +258,24 @@ def sorted_asset_events(
     repository_def: RepositoryDefinition,
 ) -> list[AssetEvent]:
     """Sort materializations by end date and toposort order."""
-    topo_aks = repository_def.asset_graph.toposorted_asset_keys
-    materializations_and_timestamps = [
-        (get_timestamp_from_materialization(mat), mat) for mat in asset_events
+    topo_index = toposort_index_for_asset_graph(repository_def.asset_graph)
+    materializations_and_sort_keys = [
+        (get_timestamp_from_materialization(mat), topo_index[mat.asset_key], mat)
+        for mat in asset_events
     ]
     return [
-        sorted_event[1]
-        for sorted_event in sorted(
-            materializations_and_timestamps, key=lambda x: (x[0], topo_aks.index(x[1].asset_key))
-        )
+        sorted_event[2]
+        for sorted_event in sorted(materializations_and_sort_keys, key=itemgetter(0, 1))
     ]
 
 
+# The asset graph is cached on the repository definition, so consecutive sensor ticks hit this cache.
+@lru_cache(maxsize=1)
+def toposort_index_for_asset_graph(asset_graph: BaseAssetGraph) -> Mapping[AssetKey, int]:
+    """Map each asset key to its position in the toposorted order of the asset graph."""
+    return {ak: i for i, ak in enumerate(asset_graph.toposorted_asset_keys)}
+
+
 def _get_transformer_result(
     event_transformer_fn: Optional[DagsterEventTransformerFn],
     context: SensorEvaluationContext,
@@ -242,42 +307,165 @@ def _get_transformer_result(
 
 @record
 class BatchResult:
-    idx: int
+    end_date: float
+    run_id: str
+    dag_runs_batch_size: int
     asset_events: Sequence[AssetMaterialization]
     all_asset_keys_materialized: set[AssetKey]
 
 
 def materializations_and_requests_from_batch_iter(
     context: SensorEvaluationContext,
-    end_date_gte: float,
-    end_date_lte: float,
-    offset: int,
+    end_date_gte: datetime,
+    end_date_lte: datetime,
+    last_end_date: Optional[float],
+    last_run_id: Optional[str],
+    batch_size: int,
+    dag_ids: Sequence[str],
     airflow_data: AirflowDefinitionsData,
-) -> Iterator[Optional[BatchResult]]:
-    runs = airflow_data.airflow_instance.get_dag_runs_batch(
-        dag_ids=list(airflow_data.dag_ids_with_mapped_asset_keys),
-        end_date_gte=datetime_from_timestamp(end_date_gte),
-        end_date_lte=datetime_from_timestamp(end_date_lte),
-        offset=offset,
+) -> Iterator[BatchResult]:
+    """Yield a result for each dag run in the range, ordered by (end date, run id).
+
+    Pages through dag runs using an end date as the lower bound of each query, and skips runs at or
+    before the last processed (end date, run id). Each end date's runs are processed together, in
+    run id order. The page size starts at `batch_size` and doubles with each page, up to the instance's
+    `batch_dag_runs_limit`.
+
+    When a full page holds only runs sharing a single end date, the page is refetched with a larger
+    size until all of that end date's runs fit. Only runs sharing an end date which don't fit in a
+    maximally sized page are paged through by offset, which assumes that airflow returns those runs in
+    the same order for each query.
+    """
+    max_batch_size = airflow_data.airflow_instance.batch_dag_runs_limit
+    batch_size = min(batch_size, max_batch_size)
+    query_end_date_gte = (
+        datetime_from_timestamp(last_end_date) if last_end_date is not None else end_date_gte
     )
-    context.log.info(f"Found {len(runs)} dag runs for {airflow_data.airflow_instance.name}")
-    context.log.info(f"All runs {runs}")
-    for i, dag_run in enumerate(runs):
-        mats = build_synthetic_asset_materializations(
-            context, airflow_data.airflow_instance, dag_run, airflow_data
-        )
-        context.log.info(f"Found {len(mats)} materializations for {dag_run.run_id}")
-
-        all_asset_keys_materialized = {mat.asset_key for mat in mats}
-        yield (
-            BatchResult(
-                idx=i + offset,
-                asset_events=mats,
-                all_asset_keys_materialized=all_asset_keys_materialized,
+    executor = InheritContextThreadPoolExecutor(
+        max_workers=DAG_RUN_PROCESSING_MAX_WORKERS,
+        thread_name_prefix="airlift_sensor_dag_run_worker",
+    )
+    # Runs fetched from the current lower bound which all share a single end date, and so can't be
+    # processed until the rest of that end date's runs have been fetched, along with the number of
+    # rows fetched to get them.
+    tied_runs: list[DagRun] = []
+    tied_runs_offset = 0
+    try:
+        while True:
+            page = airflow_data.airflow_instance.get_dag_runs_batch(
+                dag_ids=dag_ids,
+                end_date_gte=query_end_date_gte,
+                end_date_lte=end_date_lte,
+                offset=tied_runs_offset,
+                limit=batch_size,
             )
-            if mats
-            else None
-        )
+            context.log.info(f"Found {len(page)} dag runs for {airflow_data.airflow_instance.name}")
+            context.log.info(f"All runs {page}")
+            # Airflow only orders by end date, so break ties on run id to get a stable keyset. A run
+            # may appear on more than one offset page if airflow reorders ties between queries.
+            runs = sorted(
+                {run.run_id: run for run in [*tied_runs, *page]}.values(),
+                key=lambda run: (run.end_date.timestamp(), run.run_id),
+            )
+            is_full_page = len(page) >= batch_size
+            if is_full_page and runs[0].end_date == runs[-1].end_date:
+                # More runs with this end date may follow, and airflow returns them in arbitrary
+                # order. Refetch them all in a single larger page where possible, and otherwise page
+                # through the end date by offset, keeping the page size fixed.
+                if batch_size < max_batch_size:
+                    batch_size = min(batch_size * 2, max_batch_size)
+                else:
+                    tied_runs = runs
+                    tied_runs_offset += len(page)
+                continue
+            tied_runs = []
+            tied_runs_offset = 0
+            runs_to_process: list[DagRun] = []
+            for dag_run in runs:
+                if last_end_date is not None and (dag_run.end_date.timestamp(), dag_run.run_id) <= (
+                    last_end_date,
+                    check.not_none(last_run_id),
+                ):
+                    continue
+                # Runs sharing the final end date of a full page may spill over onto the next page,
+                # so defer them to the next query, which will start at that end date.
+                if is_full_page and dag_run.end_date == runs[-1].end_date:
+                    break
+                runs_to_process.append(dag_run)
+
+            dagster_runs_by_dag_run_id = get_dagster_runs_by_dag_run_id(context, runs_to_process)
+            # Each dag run requires its own round trip to airflow, so process the page
+            # concurrently, while still yielding results in order.
+            results_per_run = executor.map(
+                lambda dag_run: materializations_and_asset_keys_for_dag_run(
+                    context,
+                    dag_run,
+                    airflow_data,
+                    dagster_runs_by_dag_run_id[dag_run.run_id],
+                ),
+                runs_to_process,
+            )
+            for dag_run, (mats, all_asset_keys_materialized) in zip(
+                runs_to_process, results_per_run
+            ):
+                context.log.info(f"Found {len(mats)} materializations for {dag_run.run_id}")
+
+                yield BatchResult(
+                    end_date=dag_run.end_date.timestamp(),
+                    run_id=dag_run.run_id,
+                    dag_runs_batch_size=batch_size,
+                    asset_events=mats,
+                    all_asset_keys_materialized=all_asset_keys_materialized,
+                )
+                last_end_date, last_run_id = dag_run.end_date.timestamp(), dag_run.run_id
+
+            if not is_full_page:
+                return
+            # Every run before the deferred end date has been processed.
+            query_end_date_gte = runs[-1].end_date
+            batch_size = min(batch_size * 2, max_batch_size)
+    finally:
+        # If iteration is abandoned partway through a page (e.g. the sensor ran out of time),
+        # don't wait on the remaining dag runs.
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def get_dagster_runs_by_dag_run_id(
+    context: SensorEvaluationContext, dag_runs: Sequence[DagRun]
+) -> Mapping[str, Sequence[DagsterRun]]:
+    """Fetch the dagster runs tagged with any of the given airflow dag runs in a single query, and
+    group them by airflow run id.
+    """
+    dagster_runs_by_dag_run_id: defaultdict[str, list[DagsterRun]] = defaultdict(list)
+    if not dag_runs:
+        return dagster_runs_by_dag_run_id
+    # https://linear.app/dagster-labs/issue/FOU-444/make-sensor-work-with-an-airflow-dag-run-that-has-more-than-1000
+    dagster_runs = context.instance.get_runs(
+        filters=RunsFilter(tags={DAG_RUN_ID_TAG_KEY: [dag_run.run_id for dag_run in dag_runs]}),
+        limit=1000 * len(dag_runs),
+    )
+    for run in dagster_runs:
+        dagster_runs_by_dag_run_id[run.tags[DAG_RUN_ID_TAG_KEY]].append(run)
+    return dagster_runs_by_dag_run_id
+
+
+def materializations_and_asset_keys_for_dag_run(
+    context: SensorEvaluationContext,
+    dag_run: DagRun,
+    airflow_data: AirflowDefinitionsData,
+    dagster_runs: Sequence[DagsterRun],
+) -> tuple[Sequence[AssetMaterialization], set[AssetKey]]:
+    """Collect the synthetic materializations for a dag run, and the asset keys they target, in a
+    single pass.
+    """
+    mats: list[AssetMaterialization] = []
+    asset_keys: set[AssetKey] = set()
+    for mat in build_synthetic_asset_materializations(
+        context, airflow_data.airflow_instance, dag_run, airflow_data, dagster_runs
+    ):
+        mats.append(mat)
+        asset_keys.add(mat.asset_key)
+    return mats, asset_keys
 
 
 def build_synthetic_asset_materializations(
@@ -285,7 +473,8 @@ def build_synthetic_asset_materializations(
     airflow_instance: AirflowInstance,
     dag_run: DagRun,
     airflow_data: AirflowDefinitionsData,
-) -> list[AssetMaterialization]:
+    dagster_runs: Sequence[DagsterRun],
+) -> Iterator[AssetMaterialization]:
     """In this function we need to return the asset materializations we want to synthesize
     on behalf of the user.
 
@@ -296,8 +485,9 @@ def build_synthetic_asset_materializations(
     for observability.
 
     We do this by querying for successful task instances in Airflow. And then
-    for each successful task we see it there exists a Dagster Run tagged with
-    the run id. If there is not Dagster run, we know the task was not proxied.
+    for each successful task we see it there exists a Dagster Run (among `dagster_runs`,
+    the runs tagged with the airflow run id) for that task. If there is not Dagster run,
+    we know the task was not proxied.
 
     Task instances are mutable in Airflow, so we are not guaranteed to register
     every task instance. If, for example, the sensor is paused, and then there are
@@ -306,33 +496,24 @@ def build_synthetic_asset_materializations(
     This also currently does not support dynamic tasks in Airflow, in which case
     the use should instead map at the dag-level granularity.
     """
-    # https://linear.app/dagster-labs/issue/FOU-444/make-sensor-work-with-an-airflow-dag-run-that-has-more-than-1000
-    dagster_runs = context.instance.get_runs(
-        filters=RunsFilter(tags={DAG_RUN_ID_TAG_KEY: dag_run.run_id}),
-        limit=1000,
-    )
     context.log.info(f"Found {len(dagster_runs)} dagster runs for {dag_run.run_id}")
 
     context.log.info(
         f"Airlift Sensor: Found dagster run ids: {[run.run_id for run in dagster_runs]}"
         f" for airflow run id {dag_run.run_id} and dag id {dag_run.dag_id}"
     )
-    synthetic_mats = []
     # Peered dag-level materializations will always be emitted.
-    synthetic_mats.extend(synthetic_mats_for_peered_dag_asset_keys(dag_run, airflow_data))
+    yield from synthetic_mats_for_peered_dag_asset_keys(dag_run, airflow_data)
     # If there is a dagster run for this dag, we don't need to synthesize materializations for mapped dag assets.
     if not dagster_runs:
-        synthetic_mats.extend(synthetic_mats_for_mapped_dag_asset_keys(dag_run, airflow_data))
-    synthetic_mats.extend(
-        get_synthetic_task_mats(
-            airflow_instance=airflow_instance,
-            dagster_runs=dagster_runs,
-            dag_run=dag_run,
-            airflow_data=airflow_data,
-            context=context,
-        )
+        yield from synthetic_mats_for_mapped_dag_asset_keys(dag_run, airflow_data)
+    yield from get_synthetic_task_mats(
+        airflow_instance=airflow_instance,
+        dagster_runs=dagster_runs,
+        dag_run=dag_run,
+        airflow_data=airflow_data,
+        context=context,
     )
-    return synthetic_mats
 
 
 def get_synthetic_task_mats(
@@ -341,57 +522,54 @@ def get_synthetic_task_mats(
     dag_run: DagRun,
     airflow_data: AirflowDefinitionsData,
     context: SensorEvaluationContext,
-) -> list[AssetMaterialization]:
+) -> Iterator[AssetMaterialization]:
+    task_ids = airflow_data.task_ids_in_dag(dag_run.dag_id)
+    # Dags which are only mapped at the dag level have no tasks to query for.
+    if not task_ids:
+        return
     task_instances = airflow_instance.get_task_instance_batch(
         run_id=dag_run.run_id,
         dag_id=dag_run.dag_id,
-        task_ids=[task_id for task_id in airflow_data.task_ids_in_dag(dag_run.dag_id)],
+        task_ids=list(task_ids),
         states=["success"],
     )
-    check.invariant(
-        len({ti.task_id for ti in task_instances}) == len(task_instances),
-        "Assuming one task instance per task_id for now. Dynamic Airflow tasks not supported.",
-    )
-    synthetic_mats = []
     context.log.info(f"Found {len(task_instances)} task instances for {dag_run.run_id}")
-    context.log.info(f"All task instances {task_instances}")
+    context.log.info(f"All task instances for {dag_run.run_id}: {task_instances}")
+    task_instances_by_task_id: dict[str, TaskInstance] = {}
+    for ti in task_instances:
+        if ti.task_id in task_instances_by_task_id:
+            check.failed(
+                "Assuming one task instance per task_id for now. Dynamic Airflow tasks not supported."
+            )
+        task_instances_by_task_id[ti.task_id] = ti
     dagster_runs_by_task_id = {
         run.tags[TASK_ID_TAG_KEY]: run for run in dagster_runs if TASK_ID_TAG_KEY in run.tags
     }
-    task_instances_by_task_id = {ti.task_id: ti for ti in task_instances}
     for task_id, task_instance in task_instances_by_task_id.items():
         # No dagster runs means that the computation that materializes the asset was not proxied to Dagster.
         # Therefore the dags ran completely in Airflow, and we will synthesize materializations in Dagster corresponding to that data run.
         if task_id not in dagster_runs_by_task_id:
             context.log.info(
-                f"Synthesizing materialization for tasks {task_id} in dag {dag_run.dag_id} because no dagster run found."
-            )
-            synthetic_mats.extend(
-                synthetic_mats_for_task_instance(airflow_data, dag_run, task_instance)
+                f"Synthesizing materialization for tasks {task_id} in dag {dag_run.dag_id} and airflow run {dag_run.run_id} because no dagster run found."
             )
+            yield from synthetic_mats_for_task_instance(airflow_data, dag_run, task_instance)
         else:
             # We *always* emit for the automapped tasks, even if they are proxied
             asset_keys_to_emit = automapped_tasks_asset_keys(dag_run, airflow_data, task_instance)
 
-            synthetic_mats.extend(
-                synthetic_mats_for_mapped_asset_keys(
-                    dag_run=dag_run, task_instance=task_instance, asset_keys=asset_keys_to_emit
-                )
+            yield from synthetic_mats_for_mapped_asset_keys(
+                dag_run=dag_run, task_instance=task_instance, asset_keys=asset_keys_to_emit
             )
 
             context.log.info(
-                f"Dagster run found for task {task_id} in dag {dag_run.dag_id}. Run {dagster_runs_by_task_id[task_id].run_id}"
+                f"Dagster run found for task {task_id} in dag {dag_run.dag_id} and airflow run {dag_run.run_id}. Run {dagster_runs_by_task_id[task_id].run_id}"
             )
-    return synthetic_mats
 
 
 def automapped_tasks_asset_keys(
     dag_run: DagRun, airflow_data: AirflowDefinitionsData, task_instance: TaskInstance
-) -> set[AssetKey]:
-    asset_keys_to_emit = set()
-    asset_keys = airflow_data.asset_keys_in_task(dag_run.dag_id, task_instance.task_id)
-    for asset_key in asset_keys:
-        spec = airflow_data.all_asset_specs_by_key[asset_key]
-        if spec.metadata.get(AUTOMAPPED_TASK_METADATA_KEY):
-            asset_keys_to_emit.add(asset_key)
-    return asset_keys_to_emit
+) -> AbstractSet[AssetKey]:
+    return (
+        airflow_data.asset_keys_in_task(dag_run.dag_id, task_instance.task_id)
+        & airflow_data.automapped_asset_keys
+    )
@@ -73,6 +73,7 @@ def get_dag_runs_batch(
         end_date_gte: datetime,
         end_date_lte: datetime,
         offset: int = 0,
+        limit: Optional[int] = None,
     ) -> list[DagRun]:
         runs = [
             (run.end_date, run)
@@ -82,7 +83,8 @@ def get_dag_runs_batch(
             and run.dag_id in dag_ids
         ]
         sorted_by_end_date = [run for _, run in sorted(runs, key=lambda x: x[0])]
-        return sorted_by_end_date[offset:]
+        limit = limit if limit is not None else self.batch_dag_runs_limit
+        return sorted_by_end_date[offset : offset + limit]
 
     def get_task_instance_batch(
         self, dag_id: str, task_ids: Sequence[str], run_id: str, states: Sequence[str]
@@ -36,8 +36,10 @@
 )
 from dagster_airlift.core import build_defs_from_airflow_instance, dag_defs, task_defs
 from dagster_airlift.core.airflow_defs_data import AirflowDefinitionsData
+from dagster_airlift.core.airflow_instance import DagRun
 from dagster_airlift.core.load_defs import build_full_automapped_dags_from_airflow_instance
 from dagster_airlift.core.sensor.sensor_builder import (
+    MAIN_LOOP_TIMEOUT_SECONDS,
     AirflowPollingSensorCursor,
     AirliftSensorEventTransformerError,
 )
@@ -45,7 +47,7 @@
     key_for_automapped_task_asset,
     make_default_dag_asset_key,
 )
-from dagster_airlift.test import make_dag_run, make_instance
+from dagster_airlift.test import AirflowInstanceFake, make_dag_run, make_instance
 
 from dagster_airlift_tests.unit_tests.conftest import (
     assert_expected_key_order,
@@ -172,7 +174,7 @@ def test_interleaved_executions(init_load_context: None, instance: DagsterInstan
         cursor = deserialize_value(context.cursor, AirflowPollingSensorCursor)
         assert cursor.end_date_gte == freeze_datetime.timestamp()
         assert cursor.end_date_lte is None
-        assert cursor.dag_query_offset == 0
+        assert cursor.last_run_id is None
 
 
 def test_dependencies_within_tasks(init_load_context: None, instance: DagsterInstance) -> None:
@@ -206,7 +208,7 @@ def test_dependencies_within_tasks(init_load_context: None, instance: DagsterIns
         cursor = deserialize_value(context.cursor, AirflowPollingSensorCursor)
         assert cursor.end_date_gte == freeze_datetime.timestamp()
         assert cursor.end_date_lte is None
-        assert cursor.dag_query_offset == 0
+        assert cursor.last_run_id is None
 
 
 def test_outside_of_dag_dependency(init_load_context: None, instance: DagsterInstance) -> None:
@@ -228,7 +230,7 @@ def test_outside_of_dag_dependency(init_load_context: None, instance: DagsterIns
         cursor = deserialize_value(context.cursor, AirflowPollingSensorCursor)
         assert cursor.end_date_gte == freeze_datetime.timestamp()
         assert cursor.end_date_lte is None
-        assert cursor.dag_query_offset == 0
+        assert cursor.last_run_id is None
 
 
 def test_request_asset_checks(init_load_context: None, instance: DagsterInstance) -> None:
@@ -274,7 +276,7 @@ def check_unrelated_asset():
         cursor = deserialize_value(context.cursor, AirflowPollingSensorCursor)
         assert cursor.end_date_gte == freeze_datetime.timestamp()
         assert cursor.end_date_lte is None
-        assert cursor.dag_query_offset == 0
+        assert cursor.last_run_id is None
 
 
 _CALLCOUNT = [0]
@@ -289,6 +291,18 @@ def _mock_get_current_datetime() -> datetime:
     return next_time
 
 
+_MONOTONIC_CALLCOUNT = [0]
+
+
+def _mock_monotonic() -> float:
+    # The first two calls (computing the deadline, then the first loop check) return the same time. Every later call
+    # returns a time past the deadline, so the sensor pauses iteration after processing a single dag run.
+    _MONOTONIC_CALLCOUNT[0] += 1
+    if _MONOTONIC_CALLCOUNT[0] <= 2:
+        return 0.0
+    return float(MAIN_LOOP_TIMEOUT_SECONDS + _MONOTONIC_CALLCOUNT[0])
+
+
 def test_cursor(init_load_context: None, instance: DagsterInstance) -> None:
     """Test expected cursor behavior for sensor."""
     asset_and_dag_structure = {
@@ -298,7 +312,7 @@ def test_cursor(init_load_context: None, instance: DagsterInstance) -> None:
 
     with freeze_time(datetime(2021, 1, 1, tzinfo=timezone.utc)):
         # First, run through a full successful iteration of the sensor. Expect time to move forward, and polled dag id to be None, since we completed iteration of all dags.
-        # Then, run through a partial iteration of the sensor. We mock get_current_datetime to return a time after timeout passes iteration start after the first call, meaning we should pause iteration.
+        # Then, run through a partial iteration of the sensor. We mock the monotonic clock to return a time after the timeout after the first loop check, meaning we should pause iteration.
         repo_def = fully_loaded_repo_from_airflow_asset_graph(asset_and_dag_structure)
         sensor = next(iter(repo_def.sensor_defs))
         context = build_sensor_context(repository_def=repo_def, instance=instance)
@@ -308,11 +322,15 @@ def test_cursor(init_load_context: None, instance: DagsterInstance) -> None:
         new_cursor = deserialize_value(context.cursor, AirflowPollingSensorCursor)
         assert new_cursor.end_date_gte == datetime(2021, 1, 1, tzinfo=timezone.utc).timestamp()
         assert new_cursor.end_date_lte is None
-        assert new_cursor.dag_query_offset == 0
+        assert new_cursor.last_run_id is None
 
-    with mock.patch(
-        "dagster._time._mockable_get_current_datetime", wraps=_mock_get_current_datetime
+    with (
+        mock.patch(
+            "dagster._time._mockable_get_current_datetime", wraps=_mock_get_current_datetime
+        ),
+        mock.patch("dagster_airlift.core.sensor.sensor_builder.time") as mock_time,
     ):
+        mock_time.monotonic.side_effect = _mock_monotonic
         result = sensor(context)
         assert isinstance(result, SensorResult)
         new_cursor = deserialize_value(context.cursor, AirflowPollingSensorCursor)
@@ -320,25 +338,188 @@ def test_cursor(init_load_context: None, instance: DagsterInstance) -> None:
         assert new_cursor.end_date_gte == datetime(2021, 1, 1, tzinfo=timezone.utc).timestamp()
         # We have not yet moved forward
         assert new_cursor.end_date_lte == datetime(2021, 2, 1, tzinfo=timezone.utc).timestamp()
-        assert new_cursor.dag_query_offset == 1
+        assert new_cursor.last_run_id == "run-dag1"
 
         _CALLCOUNT[0] = 0
+        _MONOTONIC_CALLCOUNT[0] = 0
         # We weren't able to complete iteration, so we should pause iteration again
         result = sensor(context)
         assert isinstance(result, SensorResult)
         new_cursor = deserialize_value(context.cursor, AirflowPollingSensorCursor)
         assert new_cursor.end_date_gte == datetime(2021, 1, 1, tzinfo=timezone.utc).timestamp()
         assert new_cursor.end_date_lte == datetime(2021, 2, 1, tzinfo=timezone.utc).timestamp()
-        assert new_cursor.dag_query_offset == 2
+        assert new_cursor.last_run_id == "run-dag2"
 
         _CALLCOUNT[0] = 0
+        _MONOTONIC_CALLCOUNT[0] = 0
         # Now it should finish iteration.
         result = sensor(context)
         assert isinstance(result, SensorResult)
         new_cursor = deserialize_value(context.cursor, AirflowPollingSensorCursor)
         assert new_cursor.end_date_gte == datetime(2021, 2, 1, tzinfo=timezone.utc).timestamp()
         assert new_cursor.end_date_lte is None
-        assert new_cursor.dag_query_offset == 0
+        assert new_cursor.last_run_id is None
+
+
+def test_dag_runs_paged_by_end_date(init_load_context: None, instance: DagsterInstance) -> None:
+    """Test that dag runs spanning several pages, including runs with identical end dates, are each processed exactly once."""
+    freeze_datetime = datetime(2021, 1, 1, tzinfo=timezone.utc)
+    end_dates = [
+        freeze_datetime - timedelta(seconds=4),
+        freeze_datetime - timedelta(seconds=3),
+        freeze_datetime - timedelta(seconds=3),
+        freeze_datetime - timedelta(seconds=2),
+        freeze_datetime - timedelta(seconds=1),
+    ]
+    airflow_instance = make_instance(
+        dag_and_task_structure={"dag": ["task"]},
+        dag_runs=[
+            make_dag_run(
+                dag_id="dag",
+                run_id=f"run-{i}",
+                start_date=end_date - timedelta(minutes=10),
+                end_date=end_date,
+            )
+            for i, end_date in enumerate(end_dates)
+        ],
+    )
+    airflow_instance.batch_dag_runs_limit = 2
+    defs = build_defs_from_airflow_instance(
+        airflow_instance=airflow_instance,
+        defs=dag_defs("dag", task_defs("task", Definitions(assets=[AssetSpec(key="a")]))),
+    )
+    assert defs.sensors
+    sensor = next(iter(defs.sensors))
+    get_dag_runs_batch = mock.patch.object(
+        airflow_instance, "get_dag_runs_batch", wraps=airflow_instance.get_dag_runs_batch
+    )
+    initial_batch_size = mock.patch(
+        "dagster_airlift.core.sensor.sensor_builder.INITIAL_DAG_RUNS_BATCH_SIZE", 1
+    )
+    with freeze_time(freeze_datetime), initial_batch_size, get_dag_runs_batch as batch_spy:
+        context = build_sensor_context(repository_def=defs.get_repository_def(), instance=instance)
+        result = sensor(context)
+        assert isinstance(result, SensorResult)
+        # The page size starts small and doubles up to the instance's limit.
+        limits = [call.kwargs["limit"] for call in batch_spy.call_args_list]
+        assert limits[0] == 1
+        assert set(limits[1:]) == {2}
+        assert result.asset_events
+        run_ids = [event.metadata["Airflow Run ID"].value for event in result.asset_events]
+        # One materialization for the task-mapped asset and one for the dag asset, per run.
+        assert sorted(run_ids) == [f"run-{i}" for i in range(len(end_dates)) for _ in range(2)]
+        assert context.cursor
+        new_cursor = deserialize_value(context.cursor, AirflowPollingSensorCursor)
+        assert new_cursor.end_date_gte == freeze_datetime.timestamp()
+        assert new_cursor.last_run_id is None
+        assert new_cursor.dag_runs_batch_size == 2
+
+
+@pytest.mark.parametrize("batch_dag_runs_limit", [100, 2])
+def test_dag_runs_with_tied_end_dates(
+    init_load_context: None, instance: DagsterInstance, batch_dag_runs_limit: int
+) -> None:
+    """Test that dag runs sharing an end date are all processed, even when airflow returns them out of run id order and they span more than one page, or more than the instance's page limit."""
+    freeze_datetime = datetime(2021, 1, 1, tzinfo=timezone.utc)
+    end_date = freeze_datetime - timedelta(seconds=1)
+    airflow_instance = make_instance(
+        dag_and_task_structure={"dag": ["task"]},
+        dag_runs=[
+            make_dag_run(
+                dag_id="dag",
+                run_id=run_id,
+                start_date=end_date - timedelta(minutes=10),
+                end_date=end_date,
+            )
+            # The fake returns runs with identical end dates in insertion order.
+            for run_id in ["run-c", "run-b", "run-a"]
+        ],
+    )
+    airflow_instance.batch_dag_runs_limit = batch_dag_runs_limit
+    defs = build_defs_from_airflow_instance(
+        airflow_instance=airflow_instance,
+        defs=dag_defs("dag", task_defs("task", Definitions(assets=[AssetSpec(key="a")]))),
+    )
+    assert defs.sensors
+    sensor = next(iter(defs.sensors))
+    initial_batch_size = mock.patch(
+        "dagster_airlift.core.sensor.sensor_builder.INITIAL_DAG_RUNS_BATCH_SIZE", 2
+    )
+    with freeze_time(freeze_datetime), initial_batch_size:
+        context = build_sensor_context(repository_def=defs.get_repository_def(), instance=instance)
+        result = sensor(context)
+        assert isinstance(result, SensorResult)
+        assert result.asset_events
+        run_ids = [event.metadata["Airflow Run ID"].value for event in result.asset_events]
+        assert sorted(run_ids) == [
+            run_id for run_id in ["run-a", "run-b", "run-c"] for _ in range(2)
+        ]
+        assert context.cursor
+        new_cursor = deserialize_value(context.cursor, AirflowPollingSensorCursor)
+        assert new_cursor.end_date_gte == freeze_datetime.timestamp()
+        assert new_cursor.last_run_id is None
+
+
+def test_dag_runs_with_tied_end_dates_reordered_between_queries(
+    init_load_context: None, instance: DagsterInstance
+) -> None:
+    """Test that dag runs sharing an end date are each processed exactly once, even when airflow returns them in a different order for each query."""
+    freeze_datetime = datetime(2021, 1, 1, tzinfo=timezone.utc)
+    end_date = freeze_datetime - timedelta(seconds=1)
+    airflow_instance = make_instance(
+        dag_and_task_structure={"dag": ["task"]},
+        dag_runs=[
+            make_dag_run(
+                dag_id="dag",
+                run_id=run_id,
+                start_date=end_date - timedelta(minutes=10),
+                end_date=end_date,
+            )
+            for run_id in ["run-c", "run-b", "run-a"]
+        ],
+    )
+    defs = build_defs_from_airflow_instance(
+        airflow_instance=airflow_instance,
+        defs=dag_defs("dag", task_defs("task", Definitions(assets=[AssetSpec(key="a")]))),
+    )
+    assert defs.sensors
+    sensor = next(iter(defs.sensors))
+    get_dag_runs_batch = airflow_instance.get_dag_runs_batch
+    num_queries = 0
+
+    def _get_dag_runs_batch_reordered(
+        dag_ids: Sequence[str],
+        end_date_gte: datetime,
+        end_date_lte: datetime,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> list[DagRun]:
+        # Reverse the order of runs sharing an end date on every other query.
+        nonlocal num_queries
+        num_queries += 1
+        runs = get_dag_runs_batch(
+            dag_ids=dag_ids, end_date_gte=end_date_gte, end_date_lte=end_date_lte
+        )
+        if num_queries % 2 == 0:
+            runs = sorted(reversed(runs), key=lambda run: run.end_date)
+        limit = limit if limit is not None else airflow_instance.batch_dag_runs_limit
+        return runs[offset : offset + limit]
+
+    reordered = mock.patch.object(
+        airflow_instance, "get_dag_runs_batch", side_effect=_get_dag_runs_batch_reordered
+    )
+    initial_batch_size = mock.patch(
+        "dagster_airlift.core.sensor.sensor_builder.INITIAL_DAG_RUNS_BATCH_SIZE", 2
+    )
+    with freeze_time(freeze_datetime), initial_batch_size, reordered:
+        context = build_sensor_context(repository_def=defs.get_repository_def(), instance=instance)
+        result = sensor(context)
+        assert isinstance(result, SensorResult)
+        assert result.asset_events
+        run_ids = [event.metadata["Airflow Run ID"].value for event in result.asset_events]
+        assert sorted(run_ids) == [
+            run_id for run_id in ["run-a", "run-b", "run-c"] for _ in range(2)
+        ]
 
 
 def test_legacy_cursor(init_load_context: None, instance: DagsterInstance) -> None:
@@ -356,7 +537,7 @@ def test_legacy_cursor(init_load_context: None, instance: DagsterInstance) -> No
         new_cursor = deserialize_value(context.cursor, AirflowPollingSensorCursor)
         assert new_cursor.end_date_gte == datetime(2021, 1, 1, tzinfo=timezone.utc).timestamp()
         assert new_cursor.end_date_lte is None
-        assert new_cursor.dag_query_offset == 0
+        assert new_cursor.last_run_id is None
 
 
 def test_no_runs(init_load_context: None, instance: DagsterInstance) -> None:
@@ -375,11 +556,50 @@ def test_no_runs(init_load_context: None, instance: DagsterInstance) -> None:
         new_cursor = deserialize_value(context.cursor, AirflowPollingSensorCursor)
         assert new_cursor.end_date_gte == datetime(2021, 1, 1, tzinfo=timezone.utc).timestamp()
         assert new_cursor.end_date_lte is None
-        assert new_cursor.dag_query_offset == 0
+        assert new_cursor.last_run_id is None
         assert not result.asset_events
         assert not result.run_requests
 
 
+def test_idle_poll_backoff(init_load_context: None, instance: DagsterInstance) -> None:
+    """Test that consecutive polls which find no runs back off polling airflow."""
+    freeze_datetime = datetime(2021, 1, 1, tzinfo=timezone.utc)
+    repo_def = fully_loaded_repo_from_airflow_asset_graph(
+        {"dag": {"task": [("a", [])]}},
+        create_runs=False,
+    )
+    sensor = next(iter(repo_def.sensor_defs))
+    context = build_sensor_context(repository_def=repo_def, instance=instance)
+    with freeze_time(freeze_datetime):
+        sensor(context)
+        new_cursor = deserialize_value(context.cursor, AirflowPollingSensorCursor)
+        assert new_cursor.idle_poll_count == 1
+        assert new_cursor.next_poll_not_before == freeze_datetime.timestamp() + 1
+
+    with freeze_time(freeze_datetime + timedelta(seconds=1)):
+        sensor(context)
+        new_cursor = deserialize_value(context.cursor, AirflowPollingSensorCursor)
+        assert new_cursor.idle_poll_count == 2
+        assert new_cursor.next_poll_not_before == freeze_datetime.timestamp() + 3
+
+    # Before the backoff elapses, the sensor does not poll airflow or move the cursor.
+    with freeze_time(freeze_datetime + timedelta(seconds=2)):
+        cursor_before = context.cursor
+        result = sensor(context)
+        assert isinstance(result, SensorResult)
+        assert not result.asset_events
+        assert context.cursor == cursor_before
+
+    # Once the backoff reaches its maximum, the idle poll count stops growing.
+    for _ in range(10):
+        poll_datetime = datetime.fromtimestamp(new_cursor.next_poll_not_before, tz=timezone.utc)
+        with freeze_time(poll_datetime):
+            sensor(context)
+            new_cursor = deserialize_value(context.cursor, AirflowPollingSensorCursor)
+    assert new_cursor.idle_poll_count == 7
+    assert new_cursor.next_poll_not_before == poll_datetime.timestamp() + 60
+
+
 def test_automapped_tasks_only(init_load_context: None, instance: DagsterInstance) -> None:
     freeze_datetime = datetime(2021, 1, 1, tzinfo=timezone.utc)
     with freeze_time(freeze_datetime):
@@ -737,6 +957,27 @@ def test_dag_level_override_materializations(
         assert key_order.index("b") < key_order.index(make_dag_key_str("dag"))
 
 
+def test_dag_level_mapping_skips_task_instance_query(
+    init_load_context: None, instance: DagsterInstance
+) -> None:
+    """Test that task instances are not queried for dags which have no task-mapped assets."""
+    freeze_datetime = datetime(2021, 1, 1)
+
+    with (
+        freeze_time(freeze_datetime),
+        mock.patch.object(
+            AirflowInstanceFake, "get_task_instance_batch"
+        ) as get_task_instance_batch,
+    ):
+        result, _ = build_and_invoke_sensor(
+            assets_per_task={},
+            dag_level_asset_overrides={"dag": ["a"]},
+            instance=instance,
+        )
+        assert len(result.asset_events) == 2
+        get_task_instance_batch.assert_not_called()
+
+
 def test_dag_level_override_existing_runs(
     init_load_context: None, instance: DagsterInstance
 ) -> None:
@@ -1,3 +1,4 @@
+import os
 import shutil
 import tempfile
 from collections.abc import Iterator, Mapping
@@ -27,14 +28,37 @@
 
 STUB_LOCATION_PATH = Path(__file__).parent.parent / "code_locations" / "sling_location"
 COMPONENT_RELPATH = "components/ingest"
+# files which the sling_path fixture rewrites in place, and so must be real copies
+REWRITTEN_STUB_FILES = {
+    STUB_LOCATION_PATH / COMPONENT_RELPATH / "replication.yaml",
+    STUB_LOCATION_PATH / COMPONENT_RELPATH / "component.yaml",
+}
+
+
+# use the libyaml C bindings when available, as the pure-python implementation is much slower
+try:
+    from yaml import (
+        CSafeDumper as SafeDumper,
+        CSafeLoader as SafeLoader,
+    )
+except ImportError:
+    from yaml import SafeDumper, SafeLoader
 
 
 def _update_yaml(path: Path, fn) -> None:
     # applies some arbitrary fn to an existing yaml dictionary
     with open(path) as f:
-        data = yaml.safe_load(f)
+        data = yaml.load(f, Loader=SafeLoader)
     with open(path, "w") as f:
-        yaml.dump(fn(data), f)
+        yaml.dump(fn(data), f, Dumper=SafeDumper)
+
+
+def _copy_or_symlink(src: str, dst: str) -> None:
+    # only files that are rewritten need to be copied, everything else is read-only
+    if Path(src) in REWRITTEN_STUB_FILES:
+        shutil.copy2(src, dst)
+    else:
+        os.symlink(src, dst)
 
 
 @contextmanager
@@ -45,7 +69,12 @@ def sling_path() -> Iterator[Path]:
     """
     with tempfile.TemporaryDirectory() as temp_dir:
         with environ({"HOME": temp_dir}):
-            shutil.copytree(STUB_LOCATION_PATH, temp_dir, dirs_exist_ok=True)
+            shutil.copytree(
+                STUB_LOCATION_PATH,
+                temp_dir,
+                dirs_exist_ok=True,
+                copy_function=_copy_or_symlink,
+            )
 
             # update the replication yaml to reference a CSV file in the tempdir
             replication_path = Path(temp_dir) / COMPONENT_RELPATH / "replication.yaml"